@@ -1,9 +1,76 @@
 # billing_app/admin.py
 
+import json
+import os
+
+from django.conf import settings
 from django.contrib import admin
-from .models import Client, ProductService, Bill, BillItem
+from django.utils.html import format_html, format_html_join
+from .models import Client, ProductService, Bill, BillItem, ArchivedBill, ArchivedBillItem, ArchivedInvoiceDelivery, InvoiceDelivery, RequestProfile
 
 admin.site.register(Client)
 admin.site.register(ProductService)
 admin.site.register(Bill)
-admin.site.register(BillItem)
\ No newline at end of file
+admin.site.register(BillItem)
+admin.site.register(ArchivedBill)
+admin.site.register(ArchivedBillItem)
+admin.site.register(ArchivedInvoiceDelivery)
+admin.site.register(InvoiceDelivery)
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'status_code', 'duration_ms', 'query_count', 'query_time_ms', 'duplicate_query_count', 'user')
+    list_filter = ('method', 'status_code')
+    search_fields = ('path',)
+    fields = ('created_at', 'user', 'method', 'path', 'status_code', 'duration_ms', 'query_count', 'query_time_ms',
+              'duplicate_query_count', 'report_files', 'top_functions', 'duplicate_queries', 'template_timings')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def report(self, obj):
+        path = os.path.join(settings.REQUEST_PROFILES_DIR, f"{obj.report_name}.json")
+        if not os.path.isfile(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    @admin.display(description='Report files')
+    def report_files(self, obj):
+        return format_html('{0}/{1}.prof, {1}.json', settings.REQUEST_PROFILES_DIR, obj.report_name)
+
+    @admin.display(description='Top functions (cumulative)')
+    def top_functions(self, obj):
+        rows = self.report(obj).get('top_functions', [])
+        return format_html(
+            '<table><tr><th>cumulative ms</th><th>own ms</th><th>calls</th><th>function</th></tr>{}</table>',
+            format_html_join('', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+                             ((f"{row['cumtime_ms']:.1f}", f"{row['tottime_ms']:.1f}", row['ncalls'], row['function']) for row in rows)),
+        )
+
+    @admin.display(description='Duplicate queries')
+    def duplicate_queries(self, obj):
+        groups = self.report(obj).get('duplicate_queries', [])
+        if not groups:
+            return 'None'
+        return format_html(
+            '<table><tr><th>count</th><th>distinct params</th><th>ms</th><th>SQL</th><th>called from</th></tr>{}</table>',
+            format_html_join('', '<tr><td>{}</td><td>{}</td><td>{}</td><td><code>{}</code></td><td><pre>{}</pre></td></tr>',
+                             ((group['count'], group['distinct_params'], f"{group['ms']:.1f}", group['sql'],
+                               '\n\n'.join('\n'.join(origin) for origin in group['origins'])) for group in groups)),
+        )
+
+    @admin.display(description='Template render times')
+    def template_timings(self, obj):
+        rows = self.report(obj).get('templates', [])
+        if not rows:
+            return 'None'
+        return format_html(
+            '<table><tr><th>ms</th><th>template</th></tr>{}</table>',
+            format_html_join('', '<tr><td>{}</td><td>{}</td></tr>', ((f"{row['ms']:.1f}", row['name']) for row in rows)),
+        )
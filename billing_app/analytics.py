@@ -0,0 +1,175 @@
+# billing_app/analytics.py
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .cache import get_cache_version
+from .models import Bill, BillItem, ArchivedBill, ArchivedBillItem
+
+CACHE_NAMESPACE = 'analytics'
+TOP_LIMIT = 10
+
+
+def default_range(today=None):
+    # Current month plus the eleven before it
+    today = today or date.today()
+    month = today.month - 11
+    year = today.year
+    if month <= 0:
+        month += 12
+        year -= 1
+    return date(year, month, 1), today
+
+
+def _shift_year(d, years):
+    try:
+        return d.replace(year=d.year + years)
+    except ValueError:  # Feb 29 -> Feb 28
+        return d.replace(year=d.year + years, day=28)
+
+
+def _delta(current, previous):
+    if previous is None:
+        return None
+    change = current - previous
+    percent = None
+    if previous:
+        percent = float((change / previous * Decimal(100)).quantize(Decimal('0.01')))
+    return {'change': float(change), 'percent': percent}
+
+
+def _merge_top(rows, key_field, limit):
+    # Hot and archived groups are fetched in full so the merged ranking is exact
+    merged = {}
+    for row in rows:
+        key = row[key_field]
+        if key in merged:
+            for field, value in row.items():
+                if field not in (key_field, 'name'):
+                    merged[key][field] += value
+        else:
+            merged[key] = dict(row)
+    return sorted(merged.values(), key=lambda row: row['revenue'], reverse=True)[:limit]
+
+
+def revenue_by_client(user, start, end, limit=TOP_LIMIT):
+    rows = []
+    for model in (Bill, ArchivedBill):
+        grouped = model.objects.filter(user=user, bill_date__range=(start, end)) \
+            .values('client_id', 'client__name') \
+            .annotate(revenue=Sum('total_amount'), bill_count=Count('id'))
+        rows += [
+            {
+                'client_id': row['client_id'],
+                'name': row['client__name'],
+                'revenue': row['revenue'] or Decimal('0.00'),
+                'bill_count': row['bill_count'],
+            }
+            for row in grouped
+        ]
+    return [dict(row, revenue=float(row['revenue'])) for row in _merge_top(rows, 'client_id', limit)]
+
+
+def revenue_by_product(user, start, end, limit=TOP_LIMIT):
+    hot = BillItem.objects.filter(bill__user=user, bill__bill_date__range=(start, end)) \
+        .values('product_service_id', 'product_service__name') \
+        .annotate(revenue=Sum('item_total'), quantity=Sum('quantity'))
+    archived = ArchivedBillItem.objects.filter(bill__user=user, bill__bill_date__range=(start, end)) \
+        .values('product_id', 'product_name') \
+        .annotate(revenue=Sum('item_total'), quantity=Sum('quantity'))
+    rows = [
+        {'product_id': row['product_service_id'], 'name': row['product_service__name'],
+         'revenue': row['revenue'] or Decimal('0.00'), 'quantity': row['quantity']}
+        for row in hot
+    ] + [
+        {'product_id': row['product_id'], 'name': row['product_name'],
+         'revenue': row['revenue'] or Decimal('0.00'), 'quantity': row['quantity']}
+        for row in archived
+    ]
+    return [dict(row, revenue=float(row['revenue'])) for row in _merge_top(rows, 'product_id', limit)]
+
+
+def tax_by_rate(user, start, end):
+    # item_total is what was billed, tax included, so the tax in it is
+    # item_total - item_total / (1 + rate/100). Working from the stored totals
+    # keeps past bills right after a product's price changes.
+    hot = BillItem.objects.filter(bill__user=user, bill__bill_date__range=(start, end)) \
+        .values(rate=F('product_service__tax_percentage')) \
+        .annotate(gross=Sum('item_total'))
+    archived = ArchivedBillItem.objects.filter(bill__user=user, bill__bill_date__range=(start, end)) \
+        .values(rate=F('tax_percentage')) \
+        .annotate(gross=Sum('item_total'))
+
+    totals = {}
+    for row in list(hot) + list(archived):
+        totals[row['rate']] = totals.get(row['rate'], Decimal('0.00')) + (row['gross'] or Decimal('0.00'))
+    rows = []
+    for rate, gross in sorted(totals.items()):
+        base = (gross / (Decimal(1) + rate / Decimal(100))).quantize(Decimal('0.01'))
+        rows.append({
+            'tax_percentage': float(rate),
+            'taxable_amount': float(base),
+            'tax_collected': float(gross - base),
+        })
+    return rows
+
+
+def monthly_revenue(user, start, end):
+    """
+    Revenue per month in [start, end], each month carrying its month-over-month
+    and year-over-year change. The query reaches back one extra year so the
+    year-over-year figures for the first months are available.
+    """
+    history_start = _shift_year(start.replace(day=1), -1)
+    totals = {}
+    for model in (Bill, ArchivedBill):
+        rows = model.objects.filter(user=user, bill_date__range=(history_start, end)) \
+            .annotate(month=TruncMonth('bill_date')) \
+            .values('month') \
+            .annotate(revenue=Sum('total_amount'))
+        for row in rows:
+            totals[row['month']] = totals.get(row['month'], Decimal('0.00')) + (row['revenue'] or Decimal('0.00'))
+
+    series = []
+    month = start.replace(day=1)
+    while month <= end:
+        revenue = totals.get(month, Decimal('0.00'))
+        previous_month = date(month.year - 1, 12, 1) if month.month == 1 else month.replace(month=month.month - 1)
+        previous_year = month.replace(year=month.year - 1)
+        series.append({
+            'month': month.strftime('%Y-%m'),
+            'revenue': float(revenue),
+            'mom': _delta(revenue, totals.get(previous_month, Decimal('0.00'))),
+            'yoy': _delta(revenue, totals.get(previous_year, Decimal('0.00'))),
+        })
+        month = date(month.year + 1, 1, 1) if month.month == 12 else month.replace(month=month.month + 1)
+    return series
+
+
+def compute_analytics(user, start, end):
+    return {
+        'range': {'start': start.isoformat(), 'end': end.isoformat()},
+        'top_clients': revenue_by_client(user, start, end),
+        'top_products': revenue_by_product(user, start, end),
+        'tax_by_rate': tax_by_rate(user, start, end),
+        'monthly': monthly_revenue(user, start, end),
+    }
+
+
+def get_analytics(user, start, end):
+    """
+    Cached wrapper around compute_analytics(), keyed on (user, range). Saving or
+    deleting a bill, bill item, client or product bumps the user's analytics version;
+    without a shared cache other workers only see that once ANALYTICS_CACHE_TIMEOUT passes.
+    """
+    version = get_cache_version(CACHE_NAMESPACE, user.pk)
+    key = f"{CACHE_NAMESPACE}:{user.pk}:{version}:{start.isoformat()}:{end.isoformat()}"
+    data = cache.get(key)
+    if data is None:
+        data = compute_analytics(user, start, end)
+        cache.set(key, data, settings.ANALYTICS_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,83 @@
+# billing_app/archive.py
+from django.db import transaction
+from django.http import Http404
+
+from .models import Bill, InvoiceDelivery, ArchivedBill, ArchivedBillItem, ArchivedInvoiceDelivery
+
+
+def archivable_bills(before):
+    # Only settled bills are archived; unpaid ones stay editable in the hot tables
+    return Bill.objects.filter(is_paid=True, bill_date__lt=before)
+
+
+def archive_batch(before, batch_size):
+    """
+    Move up to batch_size settled bills dated before `before` (with their items
+    and invoice delivery status) into the archive tables in one transaction.
+    Returns the number moved.
+    """
+    with transaction.atomic():
+        ids = list(archivable_bills(before).select_for_update().order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return 0
+        bills = Bill.objects.filter(id__in=ids).select_related('delivery').prefetch_related('items__product_service')
+
+        archived_bills = []
+        archived_items = []
+        archived_deliveries = []
+        for bill in bills:
+            archived_bills.append(ArchivedBill(
+                id=bill.id,
+                user_id=bill.user_id,
+                client_id=bill.client_id,
+                bill_date=bill.bill_date,
+                due_date=bill.due_date,
+                total_amount=bill.total_amount,
+                is_paid=bill.is_paid,
+                created_at=bill.created_at,
+                updated_at=bill.updated_at,
+            ))
+            for item in bill.items.all():
+                archived_items.append(ArchivedBillItem(
+                    bill_id=bill.id,
+                    product_id=item.product_service_id,
+                    product_name=item.product_service.name,
+                    price=item.product_service.price,
+                    tax_percentage=item.product_service.tax_percentage,
+                    quantity=item.quantity,
+                    unit_price=item.unit_price,
+                    item_total=item.item_total,
+                ))
+            # Deleting the bill cascades to its InvoiceDelivery; keep the send history
+            try:
+                delivery = bill.delivery
+            except InvoiceDelivery.DoesNotExist:
+                continue
+            archived_deliveries.append(ArchivedInvoiceDelivery(
+                bill_id=bill.id,
+                recipient=delivery.recipient,
+                status=delivery.status,
+                attempts=delivery.attempts,
+                last_error=delivery.last_error,
+                sent_at=delivery.sent_at,
+                updated_at=delivery.updated_at,
+            ))
+
+        ArchivedBill.objects.bulk_create(archived_bills)
+        ArchivedBillItem.objects.bulk_create(archived_items)
+        ArchivedInvoiceDelivery.objects.bulk_create(archived_deliveries)
+        Bill.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def get_bill_or_archived(pk):
+    """
+    Look a bill up by id in the hot table first, then in the archive, with its
+    items prefetched either way. Raises Http404 if neither has it.
+    """
+    bill = Bill.objects.select_related('client').prefetch_related('items__product_service').filter(pk=pk).first()
+    if bill is None:
+        bill = ArchivedBill.objects.select_related('client').prefetch_related('items').filter(pk=pk).first()
+    if bill is None:
+        raise Http404("No Bill matches the given query.")
+    return bill
@@ -0,0 +1,27 @@
+# billing_app/auth_backends.py
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .cache import user_cache_key
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend whose get_user() (run on every authenticated request) is served
+    from the cache for AUTH_USER_CACHE_TIMEOUT seconds. Saving or deleting the
+    user, or logging out, drops the entry (see the receivers in models.py).
+    A timeout of 0, the default without a shared cache, disables caching.
+    """
+
+    def get_user(self, user_id):
+        if not settings.AUTH_USER_CACHE_TIMEOUT:
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            # Don't cache misses, so a new or reactivated user isn't locked out
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,33 @@
+# billing_app/cache.py
+from django.core.cache import cache
+
+
+def _version_key(namespace, user_id):
+    return f"{namespace}:version:{user_id}"
+
+
+def get_cache_version(namespace, user_id):
+    """
+    Return the current cache version for a user's data in the given namespace.
+    Cached values embed this number in their key, so bumping it invalidates them.
+    """
+    key = _version_key(namespace, user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_cache_version(namespace, user_id):
+    key = _version_key(namespace, user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key was never set (or got evicted); start a fresh version
+        cache.set(key, 2, timeout=None)
+
+
+def user_cache_key(user_id):
+    # Used by auth_backends.CachedModelBackend; deleted on user save/delete/logout
+    return f"auth_user:{user_id}"
@@ -0,0 +1,136 @@
+# billing_app/invoice_mail.py
+import glob
+import hashlib
+import io
+import os
+import smtplib
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Bill, InvoiceDelivery
+
+
+class InvoicePDFError(Exception):
+    pass
+
+
+def invoice_pdf(bill):
+    """
+    Return the invoice PDF bytes for bill. Rendered PDFs are kept in
+    INVOICE_PDF_DIR under a hash of the invoice HTML, so a bill whose invoice
+    (items, client or product details) hasn't changed since its last send is
+    not converted again. The HTML is cheap to render; the PDF is not.
+    """
+    from .pdf import html_to_pdf, render_bill_html
+
+    html = render_bill_html(bill)
+    digest = hashlib.sha1(html.encode()).hexdigest()[:16]
+    path = os.path.join(settings.INVOICE_PDF_DIR, f"Invoice_No-{bill.id}-{digest}.pdf")
+    if os.path.isfile(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    buffer = io.BytesIO()
+    status = html_to_pdf(html, buffer)
+    if status.err:
+        raise InvoicePDFError(f"Could not render the PDF for bill #{bill.id}.")
+    pdf = buffer.getvalue()
+
+    os.makedirs(settings.INVOICE_PDF_DIR, exist_ok=True)
+    for stale in glob.glob(os.path.join(settings.INVOICE_PDF_DIR, f"Invoice_No-{bill.id}-*.pdf")):
+        os.remove(stale)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.INVOICE_PDF_DIR, suffix='.pdf')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(pdf)
+    os.replace(tmp_path, path)
+    return pdf
+
+
+def invoice_message(bill, pdf, connection):
+    message = EmailMessage(
+        subject=f"Invoice #{bill.id}",
+        body=render_to_string('billing_app/invoice_email.txt', {'bill': bill}),
+        to=[bill.client.email],
+        connection=connection,
+    )
+    message.attach(f"Invoice_No-{bill.id}.pdf", pdf, 'application/pdf')
+    return message
+
+
+def _send_with_retry(connection, message, delivery, max_attempts, retry_delay):
+    for attempt in range(1, max_attempts + 1):
+        delivery.attempts += 1
+        try:
+            # open() is a no-op while connected and reconnects after a failure
+            connection.open()
+            connection.send_messages([message])
+            return None
+        except smtplib.SMTPRecipientsRefused as e:
+            return str(e)  # permanent; retrying won't help
+        except (smtplib.SMTPException, OSError) as e:
+            error = str(e) or e.__class__.__name__
+            connection.close()
+            if attempt < max_attempts:
+                time.sleep(retry_delay * attempt)
+    return error
+
+
+def send_invoices(bills, batch_size=50, max_attempts=3, retry_delay=1.0, backend=None, on_batch=None):
+    """
+    Email the invoice PDF of every bill in the `bills` queryset to its client.
+    All messages go over one connection from get_connection(backend), reopened
+    only after a failure. Bills are processed in batches of batch_size; each
+    message is retried up to max_attempts times and its outcome recorded on
+    the bill's InvoiceDelivery. on_batch(stats) is called after every batch.
+    Returns stats: {'sent', 'failed', 'seconds', 'per_second'}.
+    """
+    ids = list(bills.order_by('id').values_list('id', flat=True))
+    stats = {'sent': 0, 'failed': 0, 'seconds': 0.0, 'per_second': 0.0}
+    start = time.perf_counter()
+    connection = get_connection(backend=backend)
+    try:
+        for offset in range(0, len(ids), batch_size):
+            batch = Bill.objects.filter(id__in=ids[offset:offset + batch_size]) \
+                .select_related('client', 'delivery').prefetch_related('items__product_service').order_by('id')
+            for bill in batch:
+                try:
+                    delivery = bill.delivery
+                except InvoiceDelivery.DoesNotExist:
+                    delivery = InvoiceDelivery(bill=bill)
+                delivery.recipient = bill.client.email or ''
+
+                if not delivery.recipient:
+                    error = "Client has no email address."
+                else:
+                    try:
+                        message = invoice_message(bill, invoice_pdf(bill), connection)
+                    except InvoicePDFError as e:
+                        error = str(e)
+                    else:
+                        error = _send_with_retry(connection, message, delivery, max_attempts, retry_delay)
+
+                if error is None:
+                    delivery.status = InvoiceDelivery.STATUS_SENT
+                    delivery.sent_at = timezone.now()
+                    delivery.last_error = ''
+                    stats['sent'] += 1
+                else:
+                    delivery.status = InvoiceDelivery.STATUS_FAILED
+                    delivery.last_error = error
+                    stats['failed'] += 1
+                delivery.save()
+
+            stats['seconds'] = time.perf_counter() - start
+            if on_batch:
+                on_batch(stats)
+    finally:
+        connection.close()
+
+    stats['seconds'] = time.perf_counter() - start
+    stats['per_second'] = stats['sent'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
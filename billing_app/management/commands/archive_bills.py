@@ -0,0 +1,37 @@
+# billing_app/management/commands/archive_bills.py
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from billing_app.archive import archivable_bills, archive_batch
+
+
+class Command(BaseCommand):
+    help = "Move settled bills dated before --before (and their items) into the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', required=True, help='Archive paid bills with bill_date earlier than this date (YYYY-MM-DD).')
+        parser.add_argument('--batch-size', type=int, default=500, help='Bills moved per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many bills would be archived.')
+
+    def handle(self, *args, **options):
+        try:
+            before = datetime.strptime(options['before'], '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError("--before must be a date in YYYY-MM-DD format.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        if options['dry_run']:
+            count = archivable_bills(before).count()
+            self.stdout.write(f"{count} bills would be archived.")
+            return
+
+        total = 0
+        while True:
+            moved = archive_batch(before, options['batch_size'])
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f"Archived {total} bills...")
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} bills dated before {before}."))
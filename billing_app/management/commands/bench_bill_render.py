@@ -0,0 +1,79 @@
+# billing_app/management/commands/bench_bill_render.py
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from billing_app.models import Client, ProductService, Bill, BillItem
+from billing_app.views import bill_list, bill_detail
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ("Benchmark bill list/detail render time with cold and warm fragment caches. Sample data is rolled back; "
+            "the per-process template_fragments cache is cleared, the default cache is left alone.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bills', type=int, default=500, help='Number of bills on the list page.')
+        parser.add_argument('--items', type=int, default=200, help='Number of items on the benchmarked bill.')
+        parser.add_argument('--repeat', type=int, default=5, help='Warm renders to average over.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        user = User.objects.create_user(username='bench_bill_render')
+        client = Client.objects.create(user=user, name='Bench Client')
+        product = ProductService.objects.create(user=user, name='Bench Product', price=Decimal('99.50'), tax_percentage=Decimal('18.00'))
+        today = date.today()
+        bills = Bill.objects.bulk_create(
+            Bill(user=user, client=client, bill_date=today, due_date=today) for _ in range(options['bills'])
+        )
+        big_bill = bills[0]
+        BillItem.objects.bulk_create(
+            BillItem(bill=big_bill, product_service=product, quantity=i + 1, unit_price=product.price_with_tax,
+                     item_total=(product.price_with_tax * (i + 1)).quantize(Decimal('0.01')))
+            for i in range(options['items'])
+        )
+
+        factory = RequestFactory()
+
+        def list_request():
+            request = factory.get('/bills/')
+            request.user = user
+            return bill_list(request)
+
+        def detail_request():
+            request = factory.get(f'/bills/{big_bill.pk}/')
+            request.user = user
+            return bill_detail(request, pk=big_bill.pk)
+
+        for label, view in ((f"bill_list ({options['bills']} bills)", list_request),
+                            (f"bill_detail ({options['items']} items)", detail_request)):
+            # Fragment keys come from the bench rows' timestamps, so only the
+            # fragment cache needs emptying; 'default' may be shared with live traffic
+            caches['template_fragments'].clear()
+            start = time.perf_counter()
+            view()
+            cold = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            for _ in range(options['repeat']):
+                view()
+            warm = (time.perf_counter() - start) * 1000 / options['repeat']
+
+            self.stdout.write(f"{label}: cold {cold:.1f} ms, warm {warm:.1f} ms ({cold / warm:.1f}x)")
+        caches['template_fragments'].clear()
@@ -0,0 +1,49 @@
+# billing_app/management/commands/bench_pdf_fonts.py
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from billing_app.models import Bill
+from billing_app.pdf import render_bill_pdf
+
+
+class Command(BaseCommand):
+    help = "Compare PDF size and render time with the full embedded font vs a cached font subset."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Number of most recent bills to sample.')
+
+    def handle(self, *args, **options):
+        bills = list(Bill.objects.select_related('client').prefetch_related('items__product_service')
+                     .order_by('-bill_date', '-id')[:options['limit']])
+        if not bills:
+            raise CommandError("No bills to sample.")
+
+        # Warm the subset cache so timings reflect steady state, not the one-off build
+        render_bill_pdf(bills[0], io.BytesIO())
+
+        totals = {False: [0, 0.0], True: [0, 0.0]}
+        self.stdout.write(f"{'Bill':>8} {'full bytes':>12} {'full ms':>9} {'subset bytes':>13} {'subset ms':>10}")
+        for bill in bills:
+            row = []
+            for subset_fonts in (False, True):
+                dest = io.BytesIO()
+                start = time.perf_counter()
+                _, status = render_bill_pdf(bill, dest, subset_fonts=subset_fonts)
+                elapsed = (time.perf_counter() - start) * 1000
+                if status.err:
+                    raise CommandError(f"PDF generation failed for bill #{bill.id}.")
+                size = len(dest.getvalue())
+                totals[subset_fonts][0] += size
+                totals[subset_fonts][1] += elapsed
+                row += [size, elapsed]
+            self.stdout.write(f"{bill.id:>8} {row[0]:>12} {row[1]:>9.1f} {row[2]:>13} {row[3]:>10.1f}")
+
+        count = len(bills)
+        full_size, full_ms = totals[False]
+        subset_size, subset_ms = totals[True]
+        self.stdout.write(
+            f"Average over {count} bills: full {full_size // count} bytes / {full_ms / count:.1f} ms, "
+            f"subset {subset_size // count} bytes / {subset_ms / count:.1f} ms"
+        )
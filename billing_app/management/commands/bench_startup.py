@@ -0,0 +1,69 @@
+# billing_app/management/commands/bench_startup.py
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter so nothing is already imported. The first request
+# goes through the real WSGI handler, which imports the URLconf and views.
+PROBE = r'''
+import sys, time
+t0 = time.perf_counter()
+import django
+django.setup()
+t1 = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+from django.core.handlers.wsgi import WSGIHandler
+environ = {'PATH_INFO': sys.argv[1], 'REQUEST_METHOD': 'GET'}
+setup_testing_defaults(environ)
+status = []
+body = b''.join(WSGIHandler()(environ, lambda s, h, exc_info=None: status.append(s)))
+t2 = time.perf_counter()
+print('%s %f %f' % (status[0].split()[0], t1 - t0, t2 - t1))
+'''
+
+
+class Command(BaseCommand):
+    help = "Measure django.setup() and first-request latency in fresh interpreters, with a -X importtime breakdown."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/login/', help='URL path for the first request.')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of fresh interpreters to time.')
+        parser.add_argument('--top', type=int, default=15, help='Number of slowest imports to list.')
+
+    def run_probe(self, path, importtime=False):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', PROBE, path]
+        result = subprocess.run(cmd, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise CommandError(f"Probe failed:\n{result.stderr[-2000:]}")
+        status, setup_time, request_time = result.stdout.split()[-3:]
+        return status, float(setup_time), float(request_time), result.stderr
+
+    def handle(self, *args, **options):
+        setups, requests = [], []
+        for _ in range(options['repeat']):
+            status, setup_time, request_time, _ = self.run_probe(options['path'])
+            setups.append(setup_time)
+            requests.append(request_time)
+
+        self.stdout.write(f"GET {options['path']} -> {status}, median of {options['repeat']} runs:")
+        self.stdout.write(f"  django.setup()  {statistics.median(setups) * 1000:8.1f} ms")
+        self.stdout.write(f"  first request   {statistics.median(requests) * 1000:8.1f} ms")
+
+        # importtime lines: "import time: <self us> | <cumulative us> | <indented module>"
+        _, _, _, stderr = self.run_probe(options['path'], importtime=True)
+        top_level = {}
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative_us, module = line[len('import time:'):].split('|')
+            # Keep the largest figure per top-level package so nested modules don't double up
+            root = module.strip().split('.')[0]
+            top_level[root] = max(top_level.get(root, 0), int(cumulative_us))
+        self.stdout.write("Slowest top-level imports (cumulative):")
+        for root, cumulative_us in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:options['top']]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  {root}")
@@ -0,0 +1,97 @@
+# billing_app/management/commands/bench_tenant_backup.py
+import gzip
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from billing_app.models import Client, ProductService, Bill, BillItem
+from billing_app.tenant_backup import export_tenant, import_tenant
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare export_tenant/import_tenant with dumpdata/loaddata on generated data. All changes are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bills', type=int, default=5000, help='Number of generated bills.')
+        parser.add_argument('--items', type=int, default=5, help='Items per generated bill.')
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix='bench_tenant_')
+        try:
+            with transaction.atomic():
+                self.run(options, workdir)
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            for name in os.listdir(workdir):
+                os.remove(os.path.join(workdir, name))
+            os.rmdir(workdir)
+
+    def measure(self, label, func):
+        # Time without tracing first, then a second run for peak traced memory
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(f"{label:<28} {elapsed:>8.2f} s  peak {peak / 1024 / 1024:>8.1f} MiB")
+
+    def run(self, options, workdir):
+        user = User.objects.create_user(username='bench_tenant_source')
+        target = User.objects.create_user(username='bench_tenant_target')
+        clients = Client.objects.bulk_create(Client(user=user, name=f'Client {i}', email=f'client{i}@example.com') for i in range(50))
+        products = ProductService.objects.bulk_create(
+            ProductService(user=user, name=f'Product {i}', price=Decimal(10 + i), tax_percentage=Decimal('18.00')) for i in range(100)
+        )
+        today = date.today()
+        bills = Bill.objects.bulk_create(
+            Bill(user=user, client=clients[i % len(clients)], bill_date=today - timedelta(days=i % 700),
+                 due_date=today, total_amount=Decimal('100.00'), is_paid=i % 3 == 0)
+            for i in range(options['bills'])
+        )
+        BillItem.objects.bulk_create(
+            (BillItem(bill=bill, product_service=products[(bill.pk + j) % len(products)], quantity=j + 1,
+                      unit_price=Decimal('11.80'), item_total=Decimal('11.80') * (j + 1))
+             for bill in bills for j in range(options['items'])),
+            batch_size=2000,
+        )
+        self.stdout.write(f"{len(bills)} bills, {len(bills) * options['items']} items")
+
+        backup_path = os.path.join(workdir, 'tenant.jsonl.gz')
+        dump_path = os.path.join(workdir, 'dump.json.gz')
+
+        def export():
+            with gzip.open(backup_path, 'wt', encoding='utf-8') as stream:
+                export_tenant(user, stream)
+
+        def restore():
+            with gzip.open(backup_path, 'rt', encoding='utf-8') as stream:
+                import_tenant(target, stream)
+
+        def dump():
+            call_command('dumpdata', 'billing_app.Client', 'billing_app.ProductService', 'billing_app.Bill',
+                         'billing_app.BillItem', output=dump_path, verbosity=0)
+
+        def load():
+            call_command('loaddata', dump_path, verbosity=0)
+
+        self.measure('export_tenant', export)
+        self.measure('dumpdata', dump)
+        self.measure('import_tenant', restore)
+        self.measure('loaddata', load)
+        self.stdout.write(f"backup {os.path.getsize(backup_path) / 1024:.0f} KiB, dumpdata {os.path.getsize(dump_path) / 1024:.0f} KiB")
@@ -0,0 +1,28 @@
+# billing_app/management/commands/export_tenant.py
+import gzip
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from billing_app.tenant_backup import export_tenant
+
+
+class Command(BaseCommand):
+    help = "Stream one user's clients, products and bills to a gzipped JSON-lines backup."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User whose data is exported.')
+        parser.add_argument('output', help='Backup file to write (e.g. tenant.jsonl.gz).')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched from the database per round trip.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist.")
+
+        with gzip.open(options['output'], 'wt', encoding='utf-8', compresslevel=6) as stream:
+            counts = export_tenant(user, stream, chunk_size=options['chunk_size'])
+
+        summary = ', '.join(f"{count} {label}" for label, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Exported {summary} to {options['output']}."))
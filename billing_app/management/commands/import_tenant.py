@@ -0,0 +1,31 @@
+# billing_app/management/commands/import_tenant.py
+import gzip
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from billing_app.tenant_backup import TenantBackupError, import_tenant
+
+
+class Command(BaseCommand):
+    help = "Restore a backup written by export_tenant into a user's account, with new ids."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User who will own the restored data.')
+        parser.add_argument('input', help='Backup file written by export_tenant.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per bulk_create batch.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist.")
+
+        try:
+            with gzip.open(options['input'], 'rt', encoding='utf-8') as stream:
+                counts = import_tenant(user, stream, batch_size=options['batch_size'])
+        except (OSError, TenantBackupError) as e:
+            raise CommandError(f"Could not restore {options['input']}: {e}")
+
+        summary = ', '.join(f"{count} {label}" for label, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Restored {summary} for {user.username}."))
@@ -0,0 +1,54 @@
+# billing_app/management/commands/send_invoices.py
+from django.core.management.base import BaseCommand, CommandError
+
+from billing_app.invoice_mail import send_invoices
+from billing_app.models import Bill, InvoiceDelivery
+
+
+class Command(BaseCommand):
+    help = "Email invoice PDFs to clients over a single reused mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument('bill_ids', nargs='*', type=int, help='Bills to send (default: every bill matching the filters).')
+        parser.add_argument('--user', help='Only bills belonging to this username.')
+        parser.add_argument('--unpaid', action='store_true', help='Only unpaid bills.')
+        parser.add_argument('--resend', action='store_true', help='Include bills whose invoice was already sent.')
+        parser.add_argument('--batch-size', type=int, default=50, help='Bills loaded and sent per batch.')
+        parser.add_argument('--max-attempts', type=int, default=3, help='Send attempts per invoice before marking it failed.')
+        parser.add_argument('--backend', help='Email backend to use instead of EMAIL_BACKEND, e.g. django.core.mail.backends.locmem.EmailBackend.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many invoices would be sent.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if options['max_attempts'] < 1:
+            raise CommandError("--max-attempts must be at least 1.")
+
+        bills = Bill.objects.all()
+        if options['bill_ids']:
+            bills = bills.filter(id__in=options['bill_ids'])
+        if options['user']:
+            bills = bills.filter(user__username=options['user'])
+        if options['unpaid']:
+            bills = bills.filter(is_paid=False)
+        if not options['resend']:
+            bills = bills.exclude(delivery__status=InvoiceDelivery.STATUS_SENT)
+
+        if options['dry_run']:
+            self.stdout.write(f"{bills.count()} invoices would be sent.")
+            return
+
+        def progress(stats):
+            self.stdout.write(f"Sent {stats['sent']}, failed {stats['failed']} ({stats['seconds']:.1f} s)...")
+
+        stats = send_invoices(
+            bills,
+            batch_size=options['batch_size'],
+            max_attempts=options['max_attempts'],
+            backend=options['backend'],
+            on_batch=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {stats['sent']} invoices, {stats['failed']} failed, in {stats['seconds']:.2f} s "
+            f"({stats['per_second']:.1f} messages/s)."
+        ))
@@ -0,0 +1,34 @@
+from django.db import migrations
+from django.utils import timezone
+
+LEGACY_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+CACHED_BACKEND = 'billing_app.auth_backends.CachedModelBackend'
+
+
+def move_sessions_to_cached_backend(apps, schema_editor):
+    # ModelBackend is no longer in AUTHENTICATION_BACKENDS; point sessions that
+    # logged in through it at CachedModelBackend so they stay logged in
+    from django.contrib.auth import BACKEND_SESSION_KEY
+    from django.contrib.sessions.backends.db import SessionStore
+
+    Session = apps.get_model('sessions', 'Session')
+    store = SessionStore()
+    sessions = Session.objects.using(schema_editor.connection.alias).filter(expire_date__gt=timezone.now())
+    for session in sessions.iterator():
+        data = store.decode(session.session_data)
+        if data.get(BACKEND_SESSION_KEY) == LEGACY_BACKEND:
+            data[BACKEND_SESSION_KEY] = CACHED_BACKEND
+            session.session_data = store.encode(data)
+            session.save(update_fields=['session_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing_app', '0005_requestprofile'),
+        ('sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_sessions_to_cached_backend, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,14 @@
 # billing_app/models.py
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import cache
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from decimal import Decimal
 
+from .cache import bump_cache_version, user_cache_key
+
 class Client(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='clients')
     name = models.CharField(max_length=200)
@@ -12,6 +16,8 @@ class Client(models.Model):
     phone = models.CharField(max_length=20, blank=True, null=True)
     address = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Part of the bill fragment cache keys, so client edits refresh cached bills
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -24,6 +30,8 @@ class ProductService(models.Model):
     # NEW: Tax percentage for this product/service (e.g., 5.00 for 5%)
     tax_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0.00, help_text="e.g., 5.00 for 5%")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Part of the bill fragment cache keys, so product edits refresh cached bills
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -97,16 +105,177 @@ class BillItem(models.Model):
     def __str__(self):
         return f"{self.quantity} x {self.product_service.name} on Bill #{self.bill.id}"
 
+
+class InvoiceDelivery(models.Model):
+    """Latest emailing status of a bill's invoice (see invoice_mail.send_invoices)."""
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    bill = models.OneToOneField(Bill, on_delete=models.CASCADE, related_name='delivery')
+    recipient = models.EmailField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Invoice #{self.bill_id} to {self.recipient or '-'}: {self.status}"
+
+class RequestProfile(models.Model):
+    """A request captured by profiling.RequestProfilerMiddleware; the full report lives on disk."""
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='request_profiles')
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    query_time_ms = models.FloatField()
+    duplicate_query_count = models.PositiveIntegerField(default=0)
+    # <name>.prof and <name>.json in REQUEST_PROFILES_DIR
+    report_name = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+# --- Archive ---
+# Settled bills moved out of the hot tables by `manage.py archive_bills`.
+# ArchivedBill keeps the original bill id as its primary key so lookups by id
+# can fall through to it; items snapshot the product fields they were billed at.
+
+class ArchivedBill(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_bills')
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='archived_bills')
+    bill_date = models.DateField(db_index=True)
+    due_date = models.DateField()
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    is_paid = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    # Lets templates shared with Bill hide edit/delete actions
+    is_archived = True
+
+    def __str__(self):
+        return f"Archived Bill #{self.id} for {self.client.name} on {self.bill_date}"
+
+    @property
+    def subtotal_before_all_taxes(self):
+        return sum(item.product_service.price * item.quantity for item in self.items.all()).quantize(Decimal('0.01')) if self.items.exists() else Decimal('0.00')
+
+    @property
+    def total_tax_on_items(self):
+        return sum(item.tax_amount_per_item for item in self.items.all()).quantize(Decimal('0.01')) if self.items.exists() else Decimal('0.00')
+
+class ArchivedBillItem(models.Model):
+    bill = models.ForeignKey(ArchivedBill, on_delete=models.CASCADE, related_name='items')
+    # Product may be deleted later; the snapshot fields below keep the bill readable
+    product = models.ForeignKey(ProductService, on_delete=models.SET_NULL, null=True, blank=True)
+    product_name = models.CharField(max_length=200)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    tax_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
+    quantity = models.PositiveIntegerField(default=1)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    item_total = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+
+    @property
+    def product_service(self):
+        # Unsaved ProductService built from the snapshot, so templates written
+        # for BillItem (item.product_service.name, .price, ...) work unchanged
+        return ProductService(id=self.product_id, name=self.product_name, price=self.price, tax_percentage=self.tax_percentage)
+
+    @property
+    def get_total(self):
+        return self.item_total
+
+    @property
+    def tax_amount_per_item(self):
+        tax_per_unit = (self.price * (self.tax_percentage / Decimal(100))).quantize(Decimal('0.01'))
+        return (tax_per_unit * self.quantity).quantize(Decimal('0.01'))
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_name} on Archived Bill #{self.bill_id}"
+
+class ArchivedInvoiceDelivery(models.Model):
+    # InvoiceDelivery of an archived bill, copied over so its send history survives
+    bill = models.OneToOneField(ArchivedBill, on_delete=models.CASCADE, related_name='delivery')
+    recipient = models.EmailField(blank=True)
+    status = models.CharField(max_length=10, choices=InvoiceDelivery.STATUS_CHOICES)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Archived Invoice #{self.bill_id} to {self.recipient or '-'}: {self.status}"
+
+def _deleted_with_parent(signal_kwargs):
+    # post_delete's origin is what delete() was called on. When a Bill (or its
+    # Client/User) is being deleted, the cascade removes the bill too and
+    # per-item bookkeeping is wasted work. ProductService deletes still count.
+    origin = signal_kwargs.get('origin')
+    if origin is None:
+        return False
+    return getattr(origin, 'model', type(origin)) in (Bill, Client, User)
+
 # Signals to update Bill total_amount
 @receiver(post_save, sender=BillItem)
 @receiver(post_delete, sender=BillItem)
 def update_bill_total(sender, instance, **kwargs):
+    if _deleted_with_parent(kwargs):
+        return
     bill = instance.bill
     # total_amount is now sum of item_total (which already includes item-specific tax)
     # Ensure bill.items.all() is evaluated correctly
     bill_items_sum = sum(item.item_total for item in bill.items.all()).quantize(Decimal('0.01')) if bill.items.exists() else Decimal('0.00')
 
-    # Only save if the total_amount has actually changed to prevent infinite loops
-    if bill.total_amount != bill_items_sum:
-        bill.total_amount = bill_items_sum
-        bill.save(update_fields=['total_amount'])
\ No newline at end of file
+    # Always save so updated_at moves forward: cached bill fragments are keyed on it,
+    # and an item change must invalidate them even when the total stays the same.
+    # Saving the Bill does not fire BillItem signals, so this cannot loop.
+    bill.total_amount = bill_items_sum
+    bill.save(update_fields=['total_amount', 'updated_at'])
+
+# Signals to invalidate cached analytics when a user's bills change
+@receiver(post_save, sender=Bill)
+@receiver(post_delete, sender=Bill)
+def invalidate_bill_analytics(sender, instance, **kwargs):
+    bump_cache_version('analytics', instance.user_id)
+
+@receiver(post_save, sender=BillItem)
+@receiver(post_delete, sender=BillItem)
+def invalidate_bill_item_analytics(sender, instance, **kwargs):
+    if _deleted_with_parent(kwargs):
+        return
+    bump_cache_version('analytics', instance.bill.user_id)
+
+# Client and product names and tax rates are part of the cached analytics payload
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=ProductService)
+@receiver(post_delete, sender=ProductService)
+def invalidate_catalog_analytics(sender, instance, **kwargs):
+    bump_cache_version('analytics', instance.user_id)
+
+
+# Signals to drop the user cached by auth_backends.CachedModelBackend
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+
+@receiver(user_logged_out)
+def invalidate_cached_user_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        cache.delete(user_cache_key(user.pk))
@@ -0,0 +1,48 @@
+# billing_app/pdf.py
+# Imported lazily by views.generate_bill_pdf; see the note above it.
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.template.loader import get_template
+from xhtml2pdf import pisa  # Make sure to install xhtml2pdf: pip install xhtml2pdf
+
+from .pdf_fonts import get_font_subset
+
+
+def link_callback(uri, rel):
+    """
+    Convert HTML URIs to absolute system paths so xhtml2pdf can access them.
+    """
+    result = finders.find(uri)
+    if result:
+        path = os.path.realpath(result)
+    else:
+        path = os.path.join(settings.STATIC_ROOT, uri.replace(settings.STATIC_URL, ""))
+    return path
+
+
+def render_bill_html(bill, subset_fonts=True):
+    """
+    Render the invoice HTML for bill. With subset_fonts, the @font-face points
+    at a cached subset of NotoSans holding only the glyphs this invoice needs,
+    which is much cheaper to load.
+    """
+    font_path = os.path.join(settings.STATIC_ROOT, 'font', 'NotoSans-Regular.ttf')
+    template = get_template('billing_app/pdf_bill_template.html')
+    html = template.render({'bill': bill, 'font_path': font_path})
+    if subset_fonts:
+        html = html.replace(font_path, get_font_subset(font_path, html))
+    return html
+
+
+def html_to_pdf(html, dest):
+    return pisa.CreatePDF(html, dest=dest, link_callback=link_callback)
+
+
+def render_bill_pdf(bill, dest, subset_fonts=True):
+    """
+    Render the invoice PDF for bill into dest and return (html, pisa_status).
+    """
+    html = render_bill_html(bill, subset_fonts)
+    return html, html_to_pdf(html, dest)
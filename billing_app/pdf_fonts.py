@@ -0,0 +1,71 @@
+# billing_app/pdf_fonts.py
+import functools
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+
+try:
+    from fontTools import subset as ft_subset
+    from fontTools.ttLib import TTFont
+except ImportError:  # fontTools is optional; PDFs fall back to the full font
+    ft_subset = None
+
+# Always kept so most invoices share one cached subset: printable Latin-1 plus ₹
+BASE_CODEPOINTS = frozenset(list(range(0x20, 0x7F)) + list(range(0xA0, 0x100)) + [0x20B9])
+
+
+@functools.lru_cache(maxsize=8)
+def _font_codepoints(font_path, mtime):
+    font = TTFont(font_path, lazy=True)
+    try:
+        return frozenset(font['cmap'].getBestCmap())
+    finally:
+        font.close()
+
+
+def get_font_subset(font_path, text=''):
+    """
+    Return the path of a TrueType subset of font_path covering BASE_CODEPOINTS
+    and any other characters in text the font supports. Subsets are cached in
+    PDF_FONT_CACHE_DIR under a hash of the font and glyph set, so each one is
+    built once. Returns font_path unchanged if fontTools isn't installed or the
+    font can't be subset.
+    """
+    if ft_subset is None or not os.path.isfile(font_path):
+        return font_path
+
+    stat = os.stat(font_path)
+    available = _font_codepoints(font_path, stat.st_mtime)
+    codepoints = sorted((BASE_CODEPOINTS | {ord(ch) for ch in text}) & available)
+
+    digest = hashlib.sha1()
+    digest.update(f"{os.path.basename(font_path)}:{stat.st_size}:{stat.st_mtime}".encode())
+    digest.update(','.join(map(str, codepoints)).encode())
+    cache_dir = settings.PDF_FONT_CACHE_DIR
+    stem = os.path.splitext(os.path.basename(font_path))[0]
+    subset_path = os.path.join(cache_dir, f"{stem}-{digest.hexdigest()[:16]}.ttf")
+    if os.path.isfile(subset_path):
+        return subset_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    options = ft_subset.Options()
+    options.notdef_outline = True
+    options.name_IDs = ['*']  # ReportLab needs the font's names to register it
+    # Write to a temp file first so concurrent workers never read a partial font
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.ttf')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            font = TTFont(font_path)
+            subsetter = ft_subset.Subsetter(options)
+            subsetter.populate(unicodes=codepoints)
+            subsetter.subset(font)
+            font.save(f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, subset_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return font_path
+    return subset_path
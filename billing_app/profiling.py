@@ -0,0 +1,183 @@
+# billing_app/profiling.py
+import cProfile
+import contextlib
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import traceback
+import uuid
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+from django.utils import timezone
+
+from .models import RequestProfile
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '__profile'
+TOP_FUNCTIONS = 30
+
+# Per-thread capture state; template timings are only recorded while it is set
+_local = threading.local()
+_original_template_render = Template.render
+
+
+def _timed_template_render(self, context):
+    timings = getattr(_local, 'templates', None)
+    if timings is None:
+        return _original_template_render(self, context)
+    start = time.perf_counter()
+    try:
+        return _original_template_render(self, context)
+    finally:
+        timings.append({'name': self.name or '<string>', 'ms': (time.perf_counter() - start) * 1000})
+
+
+def _install_template_timer():
+    if Template.render is not _timed_template_render:
+        Template.render = _timed_template_render
+
+
+def _query_origin():
+    # Innermost few frames from project code, skipping this module and libraries
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        f"{os.path.relpath(frame.filename, base_dir)}:{frame.lineno} in {frame.name}"
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir) and 'site-packages' not in frame.filename and frame.filename != __file__
+    ]
+    return frames[-3:]
+
+
+class _QueryRecorder:
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': self.alias,
+                'sql': sql,
+                'params': repr(params),
+                'ms': (time.perf_counter() - start) * 1000,
+                'origin': _query_origin(),
+            })
+
+
+def _top_functions(profiler):
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, lineno, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{lineno}({func})",
+            'ncalls': ncalls,
+            'tottime_ms': tottime * 1000,
+            'cumtime_ms': cumtime * 1000,
+        })
+    rows.sort(key=lambda row: row['cumtime_ms'], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+
+def _duplicate_queries(queries):
+    # Same SQL text run more than once: identical params means a true duplicate,
+    # varying params usually means a query inside a loop (N+1)
+    groups = {}
+    for query in queries:
+        group = groups.setdefault(query['sql'], {'sql': query['sql'], 'count': 0, 'distinct_params': set(), 'ms': 0.0, 'origins': []})
+        group['count'] += 1
+        group['distinct_params'].add(query['params'])
+        group['ms'] += query['ms']
+        if query['origin'] and query['origin'] not in group['origins']:
+            group['origins'].append(query['origin'])
+    duplicates = [dict(group, distinct_params=len(group['distinct_params'])) for group in groups.values() if group['count'] > 1]
+    duplicates.sort(key=lambda group: group['count'], reverse=True)
+    return duplicates
+
+
+class RequestProfilerMiddleware:
+    """
+    Profiles a request for staff users when it carries an `X-Profile: 1`
+    header or `?__profile=1`, or at random for REQUEST_PROFILER_SAMPLE_RATE of
+    staff requests. Captures cProfile stats, every SQL query with the project
+    code that issued it, and template render times. The raw .prof file and a
+    JSON report go to REQUEST_PROFILES_DIR; a RequestProfile row lists it in the
+    admin. Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _install_template_timer()
+
+    def should_profile(self, request):
+        requested = request.META.get(PROFILE_HEADER) == '1' or request.GET.get(PROFILE_PARAM) == '1'
+        sampled = not requested and random.random() < settings.REQUEST_PROFILER_SAMPLE_RATE
+        return (requested or sampled) and getattr(request, 'user', None) is not None and request.user.is_staff
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        # The view may replace request.user (logout does), so keep who asked
+        user = request.user
+        recorders = [_QueryRecorder(connection.alias) for connection in connections.all()]
+        profiler = cProfile.Profile()
+        _local.templates = []
+        start = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection, recorder in zip(connections.all(), recorders):
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            duration_ms = (time.perf_counter() - start) * 1000
+            templates = _local.templates
+        finally:
+            _local.templates = None
+
+        queries = [query for recorder in recorders for query in recorder.queries]
+        profile = self.save(request, user, response, profiler, duration_ms, queries, templates)
+        response['X-Profile-Id'] = str(profile.pk)
+        return response
+
+    def save(self, request, user, response, profiler, duration_ms, queries, templates):
+        name = f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(settings.REQUEST_PROFILES_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(settings.REQUEST_PROFILES_DIR, f"{name}.prof"))
+
+        duplicates = _duplicate_queries(queries)
+        report = {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status_code': response.status_code,
+            'duration_ms': duration_ms,
+            'top_functions': _top_functions(profiler),
+            'queries': queries,
+            'duplicate_queries': duplicates,
+            'templates': templates,
+        }
+        report_path = os.path.join(settings.REQUEST_PROFILES_DIR, f"{name}.json")
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=1)
+
+        return RequestProfile.objects.create(
+            user=user,
+            method=request.method,
+            path=request.path[:500],
+            status_code=response.status_code,
+            duration_ms=duration_ms,
+            query_count=len(queries),
+            query_time_ms=sum(query['ms'] for query in queries),
+            duplicate_query_count=sum(group['count'] - 1 for group in duplicates),
+            report_name=name,
+        )
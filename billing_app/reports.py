@@ -0,0 +1,40 @@
+# billing_app/reports.py
+# Imported lazily by views.download_bills_csv.
+import csv
+import heapq
+from decimal import Decimal
+
+from .models import Bill, ArchivedBill
+
+
+def write_bills_csv(stream):
+    """
+    Write the bills report (hot and archived bills, newest first) as CSV to stream.
+    """
+    writer = csv.writer(stream)
+    # Header for effective tax rate
+    writer.writerow(['Bill ID', 'Client Name', 'Bill Date', 'Due Date', 'Subtotal (base)', 'Tax (%)', 'Tax Amount', 'Total Bill Amount', 'Is Paid', 'Created At'])
+
+    bills = Bill.objects.order_by('-bill_date').select_related('client').prefetch_related('items', 'items__product_service')
+    archived_bills = ArchivedBill.objects.order_by('-bill_date').select_related('client').prefetch_related('items')
+    # Both are sorted by bill date, so merging keeps the report in one date order
+    for bill in heapq.merge(bills, archived_bills, key=lambda b: b.bill_date, reverse=True):
+        subtotal_before_tax = bill.subtotal_before_all_taxes
+        total_tax = bill.total_tax_on_items
+        
+        effective_tax_rate = Decimal('0.00')
+        if subtotal_before_tax > Decimal('0.00'):
+            effective_tax_rate = (total_tax / subtotal_before_tax * Decimal(100)).quantize(Decimal('0.01'))
+
+        writer.writerow([
+            bill.id,
+            bill.client.name,
+            bill.bill_date.strftime('%Y-%m-%d'),
+            bill.due_date.strftime('%Y-%m-%d') if bill.due_date else '',
+            float(subtotal_before_tax),
+            float(effective_tax_rate), # The calculated effective tax rate
+            float(bill.total_tax_on_items), 
+            float(bill.total_amount),
+            'Yes' if bill.is_paid else 'No',
+            bill.created_at.strftime('%Y-%m-%d %H:%M:%S')
+        ])
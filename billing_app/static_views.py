@@ -0,0 +1,75 @@
+# billing_app/static_views.py
+import functools
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+# (suffix, Content-Encoding) in order of preference
+ENCODINGS = [('.br', 'br'), ('.gz', 'gzip')]
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Unhashed names can change in place, so make browsers revalidate them
+DEFAULT_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+
+@functools.lru_cache(maxsize=1)
+def _hashed_names():
+    # Names listed as values in the manifest embed a content hash
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def _accepted_encodings(request):
+    accepted = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = part.partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) == 0:
+                    continue  # explicitly refused
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+@require_safe
+def serve_static(request, path):
+    """
+    Serve a collected static file from STATIC_ROOT, preferring the brotli or
+    gzip variant written at collectstatic time. Hashed files get far-future
+    immutable caching, so repeat page loads don't request them at all.
+    """
+    # safe_join raises SuspiciousFileOperation (a 400) for paths escaping STATIC_ROOT
+    full_path = safe_join(settings.STATIC_ROOT, path)
+    if not os.path.isfile(full_path):
+        raise Http404("Static file not found.")
+
+    stat = os.stat(full_path)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    encoding = None
+    file_path = full_path
+    accepted = _accepted_encodings(request)
+    for suffix, coding in ENCODINGS:
+        if coding in accepted and os.path.isfile(full_path + suffix):
+            file_path, encoding = full_path + suffix, coding
+            break
+
+    response = FileResponse(open(file_path, 'rb'), content_type=content_type or 'application/octet-stream')
+    # FileResponse names the .br/.gz file here; the client should see the original
+    response.headers.pop('Content-Disposition', None)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Last-Modified'] = http_date(stat.st_mtime)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if path in _hashed_names() else DEFAULT_CACHE_CONTROL
+    return response
@@ -0,0 +1,212 @@
+# billing_app/tenant_backup.py
+import contextlib
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .cache import bump_cache_version
+from .models import Client, ProductService, Bill, BillItem, ArchivedBill, ArchivedBillItem
+
+FORMAT_NAME = 'vetri-tenant'
+FORMAT_VERSION = 1
+
+# (label, model, user filter, exported fields) in dependency order: every row's
+# parents appear earlier in the stream, so import never needs to look ahead.
+# Archived bills come before hot bills so the ids restore hands out to hot bills
+# are the highest; _advance_sequences() covers backups with no hot bills.
+TABLES = [
+    ('client', Client, 'user', ['id', 'name', 'email', 'phone', 'address', 'created_at', 'updated_at']),
+    ('product', ProductService, 'user', ['id', 'name', 'description', 'price', 'tax_percentage', 'created_at', 'updated_at']),
+    ('archived_bill', ArchivedBill, 'user', ['id', 'client_id', 'bill_date', 'due_date', 'total_amount', 'is_paid', 'created_at', 'updated_at', 'archived_at']),
+    ('archived_bill_item', ArchivedBillItem, 'bill__user', ['bill_id', 'product_id', 'product_name', 'price', 'tax_percentage', 'quantity', 'unit_price', 'item_total']),
+    ('bill', Bill, 'user', ['id', 'client_id', 'bill_date', 'due_date', 'total_amount', 'is_paid', 'created_at', 'updated_at']),
+    ('bill_item', BillItem, 'bill__user', ['bill_id', 'product_service_id', 'quantity', 'unit_price', 'item_total']),
+]
+
+# Foreign key column -> id map it is remapped through on import
+FOREIGN_KEYS = {
+    'client_id': 'client',
+    'product_id': 'product',
+    'product_service_id': 'product',
+    'bill_id': 'bill',
+}
+
+
+class TenantBackupError(Exception):
+    pass
+
+
+class _BackupEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder trims datetimes to milliseconds; keep them exact
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def export_tenant(user, stream, chunk_size=2000):
+    """
+    Write one user's clients, products, bills and bill items (hot and archived)
+    to `stream` as JSON lines, one row per line after a header line. Rows are
+    read in primary-key pages of chunk_size (keyset pagination), so memory stays
+    flat regardless of data size; values().iterator() would not do that on MySQL,
+    which buffers the whole result set in the client.
+    Returns {label: row count}.
+    """
+    encoder = _BackupEncoder(separators=(',', ':'), ensure_ascii=False)
+    stream.write(encoder.encode({'format': FORMAT_NAME, 'version': FORMAT_VERSION}) + '\n')
+    counts = {}
+    for label, model, user_field, fields in TABLES:
+        counts[label] = 0
+        rows = model.objects.filter(**{user_field: user}).order_by('pk')
+        last_pk = 0
+        while True:
+            page = list(rows.filter(pk__gt=last_pk).values('pk', *fields)[:chunk_size])
+            for row in page:
+                last_pk = row.pop('pk')
+                stream.write(encoder.encode([label, row]) + '\n')
+            counts[label] += len(page)
+            if len(page) < chunk_size:
+                break
+    return counts
+
+
+class _IdAllocator:
+    """
+    Hands out primary keys for restored rows. bulk_create() can't return new ids
+    on MySQL, so ids are assigned up front, starting past the current maximum.
+    Bills and archived bills share one sequence because they share an id space.
+    """
+
+    def __init__(self):
+        self.next_ids = {
+            'client': (Client.objects.aggregate(m=Max('id'))['m'] or 0) + 1,
+            'product': (ProductService.objects.aggregate(m=Max('id'))['m'] or 0) + 1,
+            'bill': max(
+                Bill.objects.aggregate(m=Max('id'))['m'] or 0,
+                ArchivedBill.objects.aggregate(m=Max('id'))['m'] or 0,
+            ) + 1,
+        }
+
+    def allocate(self, kind):
+        new_id = self.next_ids[kind]
+        self.next_ids[kind] += 1
+        return new_id
+
+
+def _advance_sequences(user, last_bill_id, client_id):
+    """
+    Make the next Client, ProductService and Bill the database creates get ids
+    above the restored ones. Restored rows carry explicit ids, which don't move
+    the id counters on every backend; archived bills never touch the Bill
+    counter at all. Without this a tenant whose backup holds only archived
+    bills would get new hot bills reusing archived ids.
+    """
+    placeholder = None
+    if last_bill_id and (Bill.objects.aggregate(m=Max('id'))['m'] or 0) < last_bill_id:
+        # MySQL and SQLite advance their counter past an explicit id on insert
+        today = datetime.date.today()
+        placeholder, = Bill.objects.bulk_create([Bill(id=last_bill_id, user=user, client_id=client_id, bill_date=today, due_date=today)])
+    # PostgreSQL and Oracle need their sequences reset to each table's max id
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [Client, ProductService, Bill]):
+            cursor.execute(sql)
+    if placeholder is not None:
+        placeholder.delete()
+
+
+def _timestamp_fields(model):
+    return [f for f in model._meta.fields if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)]
+
+
+@contextlib.contextmanager
+def _keep_timestamps(*models):
+    # Restored rows keep their original created_at/updated_at
+    fields = [f for model in models for f in _timestamp_fields(model)]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def import_tenant(user, lines, batch_size=1000):
+    """
+    Restore rows written by export_tenant() into `user`'s account, reading
+    `lines` lazily and inserting with bulk_create() in batches of batch_size.
+    Every row gets a new id and foreign keys are remapped, so a backup can be
+    restored next to existing data. Runs in a single transaction.
+    Returns {label: row count}.
+    """
+    lines = iter(lines)
+    try:
+        header = json.loads(next(lines))
+    except (StopIteration, ValueError):
+        raise TenantBackupError("Backup is empty or not a tenant export.")
+    if not isinstance(header, dict) or header.get('format') != FORMAT_NAME or header.get('version') != FORMAT_VERSION:
+        raise TenantBackupError("Unsupported backup format.")
+
+    tables = {label: (model, user_field) for label, model, user_field, _ in TABLES}
+    timestamp_fields = {label: _timestamp_fields(model) for label, (model, _) in tables.items()}
+    restored_at = timezone.now()
+    counts = {label: 0 for label in tables}
+    id_maps = {'client': {}, 'product': {}, 'bill': {}}
+    pending = []
+    pending_model = None
+
+    def flush():
+        if pending:
+            pending_model.objects.bulk_create(pending, batch_size=batch_size)
+            pending.clear()
+
+    with transaction.atomic():
+        ids = _IdAllocator()
+        with _keep_timestamps(*(model for model, _ in tables.values())):
+            for line in lines:
+                if not line.strip():
+                    continue
+                label, row = json.loads(line)
+                if label not in tables:
+                    raise TenantBackupError(f"Unknown row type {label!r} in backup.")
+                model, user_field = tables[label]
+                if model is not pending_model:
+                    flush()
+                    pending_model = model
+
+                values = {}
+                for name, value in row.items():
+                    if name in FOREIGN_KEYS and value is not None:
+                        try:
+                            value = id_maps[FOREIGN_KEYS[name]][value]
+                        except KeyError:
+                            raise TenantBackupError(f"{label} row references missing {name} {value}.")
+                    elif name != 'id':
+                        value = model._meta.get_field(name).to_python(value)
+                    values[name] = value
+                if 'id' in row:
+                    kind = 'bill' if model in (Bill, ArchivedBill) else label
+                    values['id'] = id_maps[kind][row['id']] = ids.allocate(kind)
+                if user_field == 'user':
+                    values['user'] = user
+                # Timestamps added after a backup was written start at the restore time
+                for f in timestamp_fields[label]:
+                    values.setdefault(f.name, restored_at)
+
+                pending.append(model(**values))
+                counts[label] += 1
+                if len(pending) >= batch_size:
+                    flush()
+            flush()
+        last_bill_id = ids.next_ids['bill'] - 1 if id_maps['bill'] else None
+        _advance_sequences(user, last_bill_id, next(iter(id_maps['client'].values()), None))
+    # bulk_create() sends no signals, so drop this user's cached analytics here
+    bump_cache_version('analytics', user.pk)
+    return counts
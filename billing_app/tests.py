@@ -1,3 +1,487 @@
-from django.test import TestCase
+import gzip
+import importlib
+import io
+import json
+import os
+import smtplib
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Max
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from xhtml2pdf import pisa
+
+from . import pdf_fonts
+from .analytics import compute_analytics, default_range, get_analytics, tax_by_rate
+from .archive import archive_batch
+from .invoice_mail import invoice_pdf, send_invoices
+from .models import (Client, ProductService, Bill, BillItem, ArchivedBill, ArchivedBillItem, ArchivedInvoiceDelivery,
+                     InvoiceDelivery, RequestProfile)
+from .storage import brotli
+from .static_views import DEFAULT_CACHE_CONTROL, IMMUTABLE_CACHE_CONTROL, _hashed_names
+from .tenant_backup import TenantBackupError, export_tenant, import_tenant
+
+# The manifest storage needs `collectstatic` output to resolve {% static %} when
+# DEBUG is off; tests that render pages use plain storage instead
+plain_static_storage = override_settings(STORAGES={
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+
+
+# What settings.py picks when CACHE_BACKEND names a shared cache
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db', AUTH_USER_CACHE_TIMEOUT=60)
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='owner', password='secret')
+        ProductService.objects.create(user=self.user, name='Widget', price=Decimal('10.00'))
+        self.client.login(username='owner', password='secret')
+        self.url = reverse('product_autocomplete')
+
+    def test_autocomplete_runs_only_the_product_query(self):
+        # First request warms the cached user; the session is cached at login
+        self.client.get(self.url, {'term': 'wid'})
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'term': 'wid'})
+        self.assertEqual(response.json()[0]['label'], 'Widget')
+
+    def test_user_save_invalidates_cached_user(self):
+        self.client.get(self.url, {'term': 'wid'})
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url, {'term': 'wid'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_logout_invalidates_cached_user(self):
+        self.client.get(self.url, {'term': 'wid'})
+        self.client.post(reverse('logout'))
+        response = self.client.get(self.url, {'term': 'wid'})
+        self.assertEqual(response.status_code, 302)
+
+
+    def test_failed_login_hashes_the_password_once(self):
+        with mock.patch.object(PBKDF2PasswordHasher, 'encode', autospec=True, side_effect=PBKDF2PasswordHasher.encode) as encode:
+            self.assertIsNone(authenticate(username='owner', password='wrong'))
+        self.assertEqual(encode.call_count, 1)
+
+    def test_sessions_from_model_backend_are_moved_to_cached_backend(self):
+        session = SessionStore()
+        session[SESSION_KEY] = str(self.user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = self.user.get_session_auth_hash()
+        session.create()
+        migration = importlib.import_module('billing_app.migrations.0006_move_sessions_to_cached_backend')
+        migration.move_sessions_to_cached_backend(django_apps, mock.Mock(connection=connection))
+
+        self.client.logout()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        self.assertEqual(self.client.get(self.url, {'term': 'wid'}).status_code, 200)
+
+
+class StaticPipelineTests(TestCase):
+    """collectstatic into a temp STATIC_ROOT with the project's manifest storage, then serve_static."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        static_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(static_root.cleanup)
+        cls.static_root = static_root.name
+        override = override_settings(STATIC_ROOT=cls.static_root)
+        override.enable()
+        cls.addClassCleanup(override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name('css/style.css')
+        with open(os.path.join(cls.static_root, cls.hashed), 'rb') as f:
+            cls.original = f.read()
+
+    def setUp(self):
+        _hashed_names.cache_clear()
+        self.addCleanup(_hashed_names.cache_clear)
+
+    def get(self, name, accept_encoding=None):
+        extra = {'HTTP_ACCEPT_ENCODING': accept_encoding} if accept_encoding is not None else {}
+        return self.client.get(f"/static/{name}", **extra)
+
+    def test_collectstatic_writes_compressed_variants(self):
+        self.assertNotEqual(self.hashed, 'css/style.css')
+        path = os.path.join(self.static_root, self.hashed)
+        with open(path + '.gz', 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), self.original)
+        if brotli is not None:
+            with open(path + '.br', 'rb') as f:
+                self.assertEqual(brotli.decompress(f.read()), self.original)
+
+    @skipIf(brotli is None, 'Brotli is not installed')
+    def test_negotiates_content_encoding(self):
+        for accept_encoding, expected in (('gzip, deflate, br', 'br'), ('gzip, br;q=0', 'gzip'),
+                                          ('br; q=0, gzip;q=0', None), ('', None)):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get(self.hashed, accept_encoding)
+                self.assertEqual(response.get('Content-Encoding'), expected)
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertEqual(response['Content-Type'], 'text/css')
+                body = b''.join(response.streaming_content)
+                if expected is None:
+                    self.assertEqual(body, self.original)
+
+    def test_hashed_names_are_immutable_and_plain_names_revalidate(self):
+        self.assertEqual(self.get(self.hashed)['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(self.get('css/style.css')['Cache-Control'], DEFAULT_CACHE_CONTROL)
+
+    def test_rejects_paths_outside_static_root(self):
+        with self.assertLogs('django.security.SuspiciousFileOperation', 'ERROR'):
+            self.assertEqual(self.get('css/../../manage.py').status_code, 400)
+        self.assertEqual(self.get('css/missing.css').status_code, 404)
+
+
+@skipIf(pdf_fonts.ft_subset is None, 'fontTools is not installed')
+class FontSubsetTests(TestCase):
+    font_path = os.path.join(settings.BASE_DIR, 'static', 'font', 'NotoSans-Regular.ttf')
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+        override = self.settings(PDF_FONT_CACHE_DIR=self.cache_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_subset_is_built_once_per_glyph_set(self):
+        with mock.patch.object(pdf_fonts.ft_subset, 'Subsetter', wraps=pdf_fonts.ft_subset.Subsetter) as subsetter:
+            latin = pdf_fonts.get_font_subset(self.font_path, 'Invoice ₹100')
+            again = pdf_fonts.get_font_subset(self.font_path, 'Other latin text')
+            greek = pdf_fonts.get_font_subset(self.font_path, 'Ωμέγα')
+
+        self.assertEqual(os.path.dirname(latin), self.cache_dir)
+        self.assertEqual(latin, again)
+        self.assertNotEqual(latin, greek)
+        self.assertEqual(subsetter.call_count, 2)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), sorted([os.path.basename(latin), os.path.basename(greek)]))
+        self.assertLess(os.path.getsize(latin), os.path.getsize(self.font_path))
+
+    def test_failed_subset_falls_back_to_the_full_font(self):
+        with mock.patch.object(pdf_fonts.ft_subset, 'Subsetter', side_effect=RuntimeError):
+            self.assertEqual(pdf_fonts.get_font_subset(self.font_path, 'Invoice'), self.font_path)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='owner', password='secret')
+        self.product = ProductService.objects.create(user=self.user, name='Widget', price=Decimal('100.00'), tax_percentage=Decimal('10.00'))
+        client = Client.objects.create(user=self.user, name='Acme')
+        bill = Bill.objects.create(user=self.user, client=client, bill_date=date.today(), due_date=date.today())
+        BillItem.objects.create(bill=bill, product_service=self.product, quantity=2)
+
+    def test_tax_comes_from_billed_totals_after_a_price_change(self):
+        self.product.price = Decimal('150.00')
+        self.product.save()
+        rows = tax_by_rate(self.user, date.today(), date.today())
+        self.assertEqual(rows, [{'tax_percentage': 10.0, 'taxable_amount': 200.0, 'tax_collected': 20.0}])
+
+    def test_product_change_invalidates_cached_analytics(self):
+        today = date.today()
+        self.assertEqual(get_analytics(self.user, today, today)['top_products'][0]['name'], 'Widget')
+        self.product.name = 'Gadget'
+        self.product.save()
+        self.assertEqual(get_analytics(self.user, today, today)['top_products'][0]['name'], 'Gadget')
+
+
+@plain_static_storage
+class BillFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user(username='owner', password='secret')
+        User.objects.create_user(username='viewer', password='secret')
+        self.acme = Client.objects.create(user=owner, name='Acme')
+        self.product = ProductService.objects.create(user=owner, name='Widget', price=Decimal('10.00'), tax_percentage=Decimal('5.00'))
+        self.bill = Bill.objects.create(user=owner, client=self.acme, bill_date=date.today(), due_date=date.today())
+        BillItem.objects.create(bill=self.bill, product_service=self.product, quantity=1)
+        self.client.login(username='viewer', password='secret')
+
+    def test_owner_client_edit_refreshes_other_viewers(self):
+        urls = (reverse('bill_list'), reverse('bill_detail', args=[self.bill.pk]))
+        for url in urls:
+            self.assertContains(self.client.get(url), 'Acme')
+        self.acme.name = 'Acme Renamed'
+        self.acme.save()
+        for url in urls:
+            self.assertContains(self.client.get(url), 'Acme Renamed')
+
+    def test_product_edit_refreshes_bill_detail_without_shared_cache_state(self):
+        url = reverse('bill_detail', args=[self.bill.pk])
+        self.assertContains(self.client.get(url), 'Widget')
+        # Keys come from the DB, so no cache-held counter has to reach this worker
+        with mock.patch('billing_app.models.bump_cache_version'):
+            self.product.name = 'Gadget'
+            self.product.save()
+        self.assertContains(self.client.get(url), 'Gadget')
+
+
+@plain_static_storage
+class ArchiveBillsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='owner', password='secret')
+        self.acme = Client.objects.create(user=self.user, name='Acme')
+        self.product = ProductService.objects.create(user=self.user, name='Widget', price=Decimal('10.00'), tax_percentage=Decimal('5.00'))
+        old = date.today() - timedelta(days=40)
+        self.settled = [self.make_bill(old, is_paid=True, quantity=q) for q in (1, 2, 3)]
+        self.unpaid = self.make_bill(old, is_paid=False, quantity=4)
+        self.recent = self.make_bill(date.today(), is_paid=True, quantity=5)
+        self.client.login(username='owner', password='secret')
+
+    def make_bill(self, bill_date, is_paid, quantity):
+        bill = Bill.objects.create(user=self.user, client=self.acme, bill_date=bill_date, due_date=bill_date, is_paid=is_paid)
+        BillItem.objects.create(bill=bill, product_service=self.product, quantity=quantity)
+        bill.refresh_from_db()
+        return bill
+
+    def archive(self):
+        call_command('archive_bills', before=(date.today() - timedelta(days=30)).isoformat(), batch_size=2, stdout=io.StringIO())
+
+    def test_moves_only_settled_old_bills(self):
+        sent_at = timezone.now()
+        InvoiceDelivery.objects.create(bill=self.settled[1], recipient='billing@acme.test', status=InvoiceDelivery.STATUS_SENT,
+                                       attempts=2, last_error='', sent_at=sent_at)
+        self.archive()
+        settled_ids = [bill.id for bill in self.settled]
+        self.assertFalse(Bill.objects.filter(id__in=settled_ids).exists())
+        self.assertFalse(BillItem.objects.filter(bill_id__in=settled_ids).exists())
+        self.assertEqual(set(Bill.objects.values_list('id', flat=True)), {self.unpaid.id, self.recent.id})
+
+        archived = ArchivedBill.objects.get(pk=self.settled[1].id)
+        self.assertEqual((archived.total_amount, archived.created_at, archived.updated_at),
+                         (self.settled[1].total_amount, self.settled[1].created_at, self.settled[1].updated_at))
+        item = ArchivedBillItem.objects.get(bill=archived)
+        self.assertEqual((item.product_id, item.product_name, item.price, item.quantity, item.item_total),
+                         (self.product.id, 'Widget', Decimal('10.00'), 2, Decimal('21.00')))
+        self.assertFalse(InvoiceDelivery.objects.exists())
+        delivery = archived.delivery
+        self.assertEqual((delivery.recipient, delivery.status, delivery.attempts, delivery.sent_at),
+                         ('billing@acme.test', InvoiceDelivery.STATUS_SENT, 2, sent_at))
+        self.assertFalse(ArchivedInvoiceDelivery.objects.exclude(bill=archived).exists())
+
+    def test_archived_bills_read_through(self):
+        bill = self.settled[0]
+        self.archive()
+
+        response = self.client.get(reverse('bill_detail', args=[bill.id]))
+        self.assertContains(response, f"Bill #{bill.id} (Archived)")
+        self.assertContains(response, 'Widget')
+        self.assertNotContains(response, reverse('bill_update', args=[bill.id]))
+
+        response = self.client.get(reverse('generate_bill_pdf', args=[bill.id]))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+        rows = self.client.get(reverse('download_bills_csv')).content.decode().splitlines()[1:]
+        all_ids = {b.id for b in self.settled + [self.unpaid, self.recent]}
+        self.assertEqual({int(row.split(',')[0]) for row in rows}, all_ids)
+        self.assertEqual(len(rows), len(all_ids))
+
+    def test_analytics_totals_unchanged(self):
+        start, end = default_range()
+        before = compute_analytics(self.user, start, end)
+        self.archive()
+        self.assertEqual(compute_analytics(self.user, start, end), before)
+
+
+class TenantBackupTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner')
+        self.restored = User.objects.create_user(username='restored')
+        client = Client.objects.create(user=self.owner, name='Acme', email='billing@acme.test')
+        product = ProductService.objects.create(user=self.owner, name='Widget', price=Decimal('10.00'), tax_percentage=Decimal('5.00'))
+        for bill_date, is_paid in ((date(2024, 1, 10), True), (date.today(), False)):
+            bill = Bill.objects.create(user=self.owner, client=client, bill_date=bill_date, due_date=bill_date, is_paid=is_paid)
+            BillItem.objects.create(bill=bill, product_service=product, quantity=2)
+
+    def round_trip(self):
+        stream = io.StringIO()
+        # chunk_size=1 makes every table span several keyset pages
+        exported = export_tenant(self.owner, stream, chunk_size=1)
+        stream.seek(0)
+        return exported, import_tenant(self.restored, stream, batch_size=1)
+
+    def test_restores_rows_with_remapped_keys_and_timestamps(self):
+        archive_batch(date(2025, 1, 1), batch_size=10)
+        exported, imported = self.round_trip()
+        self.assertEqual(exported, imported)
+        self.assertEqual(imported, {'client': 1, 'product': 1, 'archived_bill': 1, 'archived_bill_item': 1, 'bill': 1, 'bill_item': 1})
+
+        client = Client.objects.get(user=self.restored)
+        product = ProductService.objects.get(user=self.restored)
+        bill = Bill.objects.get(user=self.restored)
+        archived = ArchivedBill.objects.get(user=self.restored)
+        self.assertEqual(bill.client, client)
+        self.assertEqual(archived.client, client)
+        self.assertEqual(bill.items.get().product_service, product)
+        self.assertEqual(archived.items.get().product_id, product.id)
+
+        original_client = Client.objects.get(user=self.owner)
+        original_bill = Bill.objects.get(user=self.owner)
+        original_archived = ArchivedBill.objects.get(user=self.owner)
+        self.assertNotEqual(client.id, original_client.id)
+        self.assertEqual(client.created_at, original_client.created_at)
+        self.assertEqual((bill.created_at, bill.updated_at), (original_bill.created_at, original_bill.updated_at))
+        self.assertEqual((archived.created_at, archived.updated_at, archived.archived_at),
+                         (original_archived.created_at, original_archived.updated_at, original_archived.archived_at))
+
+    def test_new_bills_do_not_reuse_restored_archive_ids(self):
+        Bill.objects.update(is_paid=True, bill_date=date(2024, 1, 10))
+        archive_batch(date(2025, 1, 1), batch_size=10)
+        self.round_trip()
+
+        client = Client.objects.get(user=self.restored)
+        bill = Bill.objects.create(user=self.restored, client=client, bill_date=date(2024, 2, 1), due_date=date(2024, 2, 1), is_paid=True)
+        self.assertGreater(bill.id, ArchivedBill.objects.aggregate(m=Max('id'))['m'])
+        self.assertEqual(archive_batch(date(2025, 1, 1), batch_size=10), 1)
+
+    def test_resets_client_product_and_bill_sequences(self):
+        with mock.patch.object(connection.ops, 'sequence_reset_sql', return_value=[]) as reset:
+            self.round_trip()
+        self.assertEqual(reset.call_args.args[1], [Client, ProductService, Bill])
+        restored_ids = list(Client.objects.filter(user=self.restored).values_list('id', flat=True))
+        self.assertGreater(Client.objects.create(user=self.restored, name='New').id, max(restored_ids))
+
+    def test_rejects_unknown_header(self):
+        with self.assertRaises(TenantBackupError):
+            import_tenant(self.restored, iter(['{"format": "something-else", "version": 1}\n']))
+        with self.assertRaises(TenantBackupError):
+            import_tenant(self.restored, iter([]))
+        self.assertFalse(Client.objects.filter(user=self.restored).exists())
+
+
+class SendInvoicesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='secret')
+        product = ProductService.objects.create(user=self.user, name='Widget', price=Decimal('10.00'), tax_percentage=Decimal('5.00'))
+        with_email = Client.objects.create(user=self.user, name='Acme', email='billing@acme.test')
+        without_email = Client.objects.create(user=self.user, name='No Mail')
+        self.bills = []
+        for client in (with_email, with_email, without_email):
+            bill = Bill.objects.create(user=self.user, client=client, bill_date=date.today(), due_date=date.today())
+            BillItem.objects.create(bill=bill, product_service=product, quantity=1)
+            self.bills.append(bill)
+
+    def test_sends_over_one_connection_and_tracks_status(self):
+        with tempfile.TemporaryDirectory() as pdf_dir, self.settings(INVOICE_PDF_DIR=pdf_dir), \
+                mock.patch('billing_app.invoice_mail.get_connection', wraps=get_connection) as connection_factory:
+            stats = send_invoices(Bill.objects.all(), batch_size=2)
+
+        self.assertEqual(connection_factory.call_count, 1)
+        self.assertEqual((stats['sent'], stats['failed']), (2, 1))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['billing@acme.test'])
+        self.assertEqual(mail.outbox[0].attachments[0][2], 'application/pdf')
+        statuses = dict(InvoiceDelivery.objects.values_list('bill_id', 'status'))
+        self.assertEqual(statuses, {
+            self.bills[0].id: InvoiceDelivery.STATUS_SENT,
+            self.bills[1].id: InvoiceDelivery.STATUS_SENT,
+            self.bills[2].id: InvoiceDelivery.STATUS_FAILED,
+        })
+
+    def test_retries_transient_failures(self):
+        connection = mock.Mock()
+        connection.send_messages.side_effect = [smtplib.SMTPServerDisconnected(), 1]
+        with tempfile.TemporaryDirectory() as pdf_dir, self.settings(INVOICE_PDF_DIR=pdf_dir), \
+                mock.patch('billing_app.invoice_mail.get_connection', return_value=connection):
+            stats = send_invoices(Bill.objects.filter(pk=self.bills[0].pk), retry_delay=0)
+
+        self.assertEqual(stats['sent'], 1)
+        delivery = InvoiceDelivery.objects.get(bill=self.bills[0])
+        self.assertEqual((delivery.status, delivery.attempts), (InvoiceDelivery.STATUS_SENT, 2))
+
+
+    def test_client_edit_rerenders_cached_pdf(self):
+        bill = self.bills[0]
+        with tempfile.TemporaryDirectory() as pdf_dir, self.settings(INVOICE_PDF_DIR=pdf_dir), \
+                mock.patch('billing_app.pdf.pisa.CreatePDF', wraps=pisa.CreatePDF) as create_pdf:
+            invoice_pdf(bill)
+            invoice_pdf(bill)
+            self.assertEqual(create_pdf.call_count, 1)
+
+            Client.objects.filter(pk=bill.client_id).update(name='Acme Renamed')
+            bill = Bill.objects.get(pk=bill.pk)
+            invoice_pdf(bill)
+            self.assertEqual(create_pdf.call_count, 2)
+            self.assertEqual(len(os.listdir(pdf_dir)), 1)
+
+    def test_send_button_tries_once_without_sleeping(self):
+        connection = mock.Mock()
+        connection.send_messages.side_effect = smtplib.SMTPServerDisconnected()
+        self.client.force_login(self.user)
+        with tempfile.TemporaryDirectory() as pdf_dir, self.settings(INVOICE_PDF_DIR=pdf_dir), \
+                mock.patch('billing_app.invoice_mail.get_connection', return_value=connection), \
+                mock.patch('billing_app.invoice_mail.time.sleep') as sleep:
+            self.client.post(reverse('bill_send_invoice', args=[self.bills[0].pk]))
+
+        delivery = InvoiceDelivery.objects.get(bill=self.bills[0])
+        self.assertEqual((delivery.status, delivery.attempts), (InvoiceDelivery.STATUS_FAILED, 1))
+        sleep.assert_not_called()
+
+    def test_command_rejects_non_positive_attempts(self):
+        with self.assertRaisesMessage(CommandError, '--max-attempts must be at least 1.'):
+            call_command('send_invoices', max_attempts=0, stdout=io.StringIO())
+
+
+@plain_static_storage
+class RequestProfilerTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='secret', is_staff=True)
+        self.profiles_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profiles_dir.cleanup)
+        self.settings_override = self.settings(REQUEST_PROFILES_DIR=self.profiles_dir.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_staff_request_with_flag_is_profiled(self):
+        self.client.login(username='staff', password='secret')
+        response = self.client.get(reverse('product_list'), HTTP_X_PROFILE='1')
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response['X-Profile-Id'], str(profile.pk))
+        self.assertEqual(profile.path, reverse('product_list'))
+        self.assertGreater(profile.query_count, 0)
+        with open(os.path.join(self.profiles_dir.name, f"{profile.report_name}.json")) as f:
+            report = json.load(f)
+        self.assertTrue(report['top_functions'])
+        self.assertIn('billing_app/product_list.html', [t['name'] for t in report['templates']])
+        self.assertTrue(os.path.isfile(os.path.join(self.profiles_dir.name, f"{profile.report_name}.prof")))
+
+    def test_profiling_a_logout_records_the_staff_user(self):
+        self.client.login(username='staff', password='secret')
+        response = self.client.post(reverse('logout') + '?__profile=1')
+
+        self.assertEqual(response.status_code, 302)
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.user, self.staff)
+        self.assertEqual(response['X-Profile-Id'], str(profile.pk))
+
+    def test_non_staff_and_unflagged_requests_are_not_profiled(self):
+        User.objects.create_user(username='member', password='secret')
+        self.client.login(username='member', password='secret')
+        self.client.get(reverse('product_list'), {'__profile': '1'})
+        self.client.login(username='staff', password='secret')
+        self.client.get(reverse('product_list'))
+        self.assertFalse(RequestProfile.objects.exists())
@@ -27,6 +27,8 @@ urlpatterns = [
     path('bills/<int:pk>/update/', views.bill_update, name='bill_update'),
     path('bills/<int:pk>/delete/', views.bill_delete, name='bill_delete'),
     path('bills/<int:pk>/pdf/', views.generate_bill_pdf, name='generate_bill_pdf'),
+    path('bills/<int:pk>/send/', views.bill_send_invoice, name='bill_send_invoice'),
     path('reports/bills/csv/', views.download_bills_csv, name='download_bills_csv'),
+    path('reports/analytics/', views.revenue_analytics, name='revenue_analytics'),
     
 ]
\ No newline at end of file
@@ -1,43 +1,41 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib import messages
 from django.forms import inlineformset_factory
 from django.db.models import Sum
 from datetime import datetime
 import json
-from django.conf import settings
 from decimal import Decimal # Import Decimal
 
-from django.conf import settings
-from django.contrib.staticfiles import finders
-import os
-
-# For reports
 from django.http import HttpResponse, JsonResponse
-from django.template.loader import get_template
-from xhtml2pdf import pisa  # Make sure to install xhtml2pdf: pip install xhtml2pdf
-import csv
 from django.db.models.functions import TruncMonth # For analytics
 
-from .models import Client, ProductService, Bill, BillItem
+from .models import Client, ProductService, Bill, BillItem, ArchivedBill, InvoiceDelivery
 from .forms import ClientForm, ProductServiceForm, BillForm, BillItemFormSet
+from .analytics import default_range, get_analytics
+from .archive import get_bill_or_archived
 
 @login_required
 def dashboard_view(request):
     # Basic counts
     total_clients = Client.objects.count()
     total_products = ProductService.objects.count()
-    total_bills = Bill.objects.count()
+    total_bills = Bill.objects.count() + ArchivedBill.objects.count()
     unpaid_bills_count = Bill.objects.filter(is_paid=False).count()
 
     # Monthly Income Analytics
-    monthly_income_data = Bill.objects.filter( is_paid=True) \
-        .annotate(month=TruncMonth('bill_date')) \
-        .values('month') \
-        .annotate(total_income=Sum('total_amount')) \
-        .order_by('month')
-
-    months = [item['month'].strftime('%Y-%m') for item in monthly_income_data]
-    incomes = [float(item['total_income']) for item in monthly_income_data]
+    # Archived bills are all paid, so their months are merged in as well
+    monthly_income = {}
+    for model in (Bill, ArchivedBill):
+        monthly_income_data = model.objects.filter( is_paid=True) \
+            .annotate(month=TruncMonth('bill_date')) \
+            .values('month') \
+            .annotate(total_income=Sum('total_amount'))
+        for item in monthly_income_data:
+            monthly_income[item['month']] = monthly_income.get(item['month'], Decimal('0.00')) + item['total_income']
+
+    months = [month.strftime('%Y-%m') for month in sorted(monthly_income)]
+    incomes = [float(monthly_income[month]) for month in sorted(monthly_income)]
 
     chart_data = {
         'labels': [datetime.strptime(m, '%Y-%m').strftime('%b %Y') for m in months],
@@ -132,12 +130,25 @@ def product_delete(request, pk):
 # --- Bill Views (Most Complex) ---
 @login_required
 def bill_list(request):
-    bills = Bill.objects.order_by('-bill_date', '-created_at')
+    bills = Bill.objects.select_related('client').order_by('-bill_date', '-created_at')
+    # Rows are fragment-cached on bill.updated_at and bill.client.updated_at
     return render(request, 'billing_app/bill_list.html', {'bills': bills})
 
+def _bill_render_version(bill):
+    # The detail fragment also shows client and product details, so its key
+    # includes when those last changed. Keys come from the DB rather than a
+    # cache-held counter, so every worker sees an edit at once. Archived items
+    # are snapshots and never change.
+    stamps = [bill.client.updated_at]
+    if not getattr(bill, 'is_archived', False):
+        stamps += [item.product_service.updated_at for item in bill.items.all()]
+    return max(stamps).isoformat()
+
 @login_required
 def bill_detail(request, pk):
-    bill = get_object_or_404(Bill.objects.prefetch_related('items__product_service'), pk=pk)
+    # Falls back to the archive for bills moved out by `manage.py archive_bills`
+    bill = get_bill_or_archived(pk)
+    bill.render_version = _bill_render_version(bill)
     return render(request, 'billing_app/bill_detail.html', {'bill': bill})
 
 # Helper function to serialize Decimal objects to strings
@@ -243,71 +254,48 @@ def bill_delete(request, pk):
     return redirect('bill_list')
 
 
-def link_callback(uri, rel):
-    """
-    Convert HTML URIs to absolute system paths so xhtml2pdf can access them.
-    """
-    result = finders.find(uri)
-    if result:
-        path = os.path.realpath(result)
-    else:
-        path = os.path.join(settings.STATIC_ROOT, uri.replace(settings.STATIC_URL, ""))
-    return path
-
-from django.templatetags.static import static
-import os
 # --- Report Generation ---
+# PDF and CSV code lives in billing_app.pdf / billing_app.reports and is imported
+# inside the views: xhtml2pdf pulls in reportlab, html5lib and pyHanko, and
+# importing it here would add that to every worker's boot via the URLconf.
 @login_required
 def generate_bill_pdf(request, pk):
-    bill = get_object_or_404(Bill.objects.prefetch_related('items__product_service'), pk=pk)
-    template_path = 'billing_app/pdf_bill_template.html'
-
-    context = {'bill': bill, 'font_path': os.path.join(settings.STATIC_ROOT, 'font', 'NotoSans-Regular.ttf'),}
-
-    template = get_template(template_path)
-    html = template.render(context)
+    bill = get_bill_or_archived(pk)
 
     response = HttpResponse(content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="Invoice_No-{bill.id}.pdf"'
 
-    if pisa.CreatePDF(html, dest=response, link_callback=link_callback).err:
+    from .pdf import render_bill_pdf
+
+    html, status = render_bill_pdf(bill, response)
+    if status.err:
          return HttpResponse('We had some errors <pre>' + html + '</pre>')
     return response
 
-
-
+@login_required
+def bill_send_invoice(request, pk):
+    bill = get_object_or_404(Bill, pk=pk)
+    if request.method == 'POST':
+        from .invoice_mail import send_invoices
+
+        # One attempt and no backoff sleeps inside a web request; EMAIL_TIMEOUT
+        # bounds a stalled SMTP server. `manage.py send_invoices` retries.
+        send_invoices(Bill.objects.filter(pk=bill.pk), max_attempts=1)
+        delivery = InvoiceDelivery.objects.get(bill=bill)
+        if delivery.status == InvoiceDelivery.STATUS_SENT:
+            messages.success(request, f"Invoice #{bill.id} sent to {delivery.recipient}.")
+        else:
+            messages.error(request, f"Invoice #{bill.id} was not sent: {delivery.last_error}")
+    return redirect('bill_detail', pk=bill.pk)
 
 @login_required
 def download_bills_csv(request):
     response = HttpResponse(content_type='text/csv')
     response['Content-Disposition'] = 'attachment; filename="bills_report.csv"'
 
-    writer = csv.writer(response)
-    # Header for effective tax rate
-    writer.writerow(['Bill ID', 'Client Name', 'Bill Date', 'Due Date', 'Subtotal (base)', 'Tax (%)', 'Tax Amount', 'Total Bill Amount', 'Is Paid', 'Created At'])
-
-    bills = Bill.objects.order_by('-bill_date').prefetch_related('items', 'items__product_service')
-    for bill in bills:
-        subtotal_before_tax = bill.subtotal_before_all_taxes
-        total_tax = bill.total_tax_on_items
-        
-        effective_tax_rate = Decimal('0.00')
-        if subtotal_before_tax > Decimal('0.00'):
-            effective_tax_rate = (total_tax / subtotal_before_tax * Decimal(100)).quantize(Decimal('0.01'))
-
-        writer.writerow([
-            bill.id,
-            bill.client.name,
-            bill.bill_date.strftime('%Y-%m-%d'),
-            bill.due_date.strftime('%Y-%m-%d') if bill.due_date else '',
-            float(subtotal_before_tax),
-            float(effective_tax_rate), # The calculated effective tax rate
-            float(bill.total_tax_on_items), 
-            float(bill.total_amount),
-            'Yes' if bill.is_paid else 'No',
-            bill.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        ])
+    from .reports import write_bills_csv
 
+    write_bills_csv(response)
     return response
 
 @login_required
@@ -316,4 +304,20 @@ def product_autocomplete(request):
         qs = ProductService.objects.filter( name__icontains=request.GET.get('term'))
         products = [{'id': p.id, 'label': p.name, 'value': p.name, 'price': float(p.price)} for p in qs]
         return JsonResponse(products, safe=False)
-    return JsonResponse([], safe=False)
\ No newline at end of file
+    return JsonResponse([], safe=False)
+
+
+@login_required
+def revenue_analytics(request):
+    # Optional ?start=YYYY-MM-DD&end=YYYY-MM-DD, defaults to the last 12 months
+    start, end = default_range()
+    try:
+        if request.GET.get('start'):
+            start = datetime.strptime(request.GET['start'], '%Y-%m-%d').date()
+        if request.GET.get('end'):
+            end = datetime.strptime(request.GET['end'], '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': 'Dates must be in YYYY-MM-DD format.'}, status=400)
+    if start > end:
+        return JsonResponse({'error': 'start must not be after end.'}, status=400)
+    return JsonResponse(get_analytics(request.user, start, end))
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -47,6 +48,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'billing_app.profiling.RequestProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -100,6 +102,61 @@ DATABASES = {
 }
 
 
+# Caches
+# The default cache is per-process locmem unless CACHE_BACKEND/CACHE_LOCATION
+# point at a shared one, e.g. django.core.cache.backends.redis.RedisCache and
+# redis://127.0.0.1:6379/1 (or memcached, or the DB cache). Anything that must
+# agree across workers, like sessions and logged-in users, is only cached
+# when the cache is shared.
+# The cache template tag uses the 'template_fragments' alias when it exists;
+# give bill fragments room so long bill lists aren't culled on every render.
+
+DEFAULT_CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+_shared_cache = DEFAULT_CACHE_BACKEND != 'django.core.cache.backends.locmem.LocMemCache'
+
+CACHES = {
+    'default': {
+        'BACKEND': DEFAULT_CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    },
+}
+
+# Analytics are cached per user and invalidated by bumping a version key in the
+# default cache. On locmem that bump only reaches the worker that saved the
+# bill, so other workers may serve results up to this many seconds old.
+ANALYTICS_CACHE_TIMEOUT = 60 * 60 if _shared_cache else 60
+
+
+# Sessions and authentication
+# With a shared cache, cached_db sessions are read from the cache and only fall
+# back to the DB on a miss, and CachedModelBackend does the same for the
+# logged-in User, saving two DB round trips per authenticated request. With
+# the per-process locmem cache a logout would only clear the worker that
+# handled it, so sessions stay in the DB and users aren't cached.
+# Sessions created under ModelBackend were moved to CachedModelBackend by
+# migration 0006; listing both would hash every failed login's password twice.
+
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if _shared_cache else 'django.contrib.sessions.backends.db',
+)
+
+AUTHENTICATION_BACKENDS = [
+    'billing_app.auth_backends.CachedModelBackend',
+]
+
+# Seconds a user stays cached; 0 turns CachedModelBackend's cache off
+AUTH_USER_CACHE_TIMEOUT = 60 if _shared_cache else 0
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -142,9 +199,49 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles') # For production deployment
 
+# collectstatic writes content-hashed names plus .gz/.br variants,
+# which billing_app.static_views.serve_static serves with immutable caching.
+# With DEBUG = False, {% static %} looks names up in STATIC_ROOT/staticfiles.json,
+# so `manage.py collectstatic` must run before the site (or anything rendering
+# templates outside the test suite) is started. Tests swap in StaticFilesStorage.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'billing_app.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'mediafiles')
 
+# Font subsets embedded in generated PDFs, cached by glyph-set hash. They are
+# rebuilt on demand, so this lives outside the source tree and can be wiped.
+PDF_FONT_CACHE_DIR = os.environ.get('PDF_FONT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'billing_font_subsets'))
+
+# Rendered invoice PDFs reused by the "send invoices" emails
+INVOICE_PDF_DIR = os.path.join(MEDIA_ROOT, 'invoices')
+
+# Staff-only request profiler (billing_app.profiling): add `X-Profile: 1` or
+# `?__profile=1` to a request, or set a sample rate to profile staff requests at random
+REQUEST_PROFILES_DIR = os.path.join(MEDIA_ROOT, 'profiles')
+REQUEST_PROFILER_SAMPLE_RATE = 0.0
+
+# Email
+# Use 'django.core.mail.backends.locmem.EmailBackend' or the console backend
+# to try invoice sending without a real SMTP server.
+
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+# Seconds before a stalled SMTP connection gives up, so sends can't hang a worker
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 10))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'billing@localhost')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 